@@ -4,47 +4,89 @@
 Reads 23andMe TSV file and converts first 1000 SNPs to TOML format
 """
 
+import dataclasses
 import hashlib
+import mmap
+import operator
 import sys
 import os
-from typing import List, Dict, Tuple
+import re
+import struct
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import starmap
+from typing import Dict, Iterable, List, Optional, Tuple
 
-def calculate_quality_metrics(markers: List[Dict]) -> Tuple[float, float, float]:
+@dataclass
+class MarkerTable:
     """
-    Calculate genetic data quality metrics using encoded alleles
-    Returns: (call_rate, heterozygosity_rate, ti_tv_ratio)
+    Column-oriented storage for parsed genetic markers
+    Encoded values live in compact typed columns (int8 chromosome and
+    alleles, uint32 position) instead of one dict per marker. The raw_*
+    columns keep the input spelling for the TOML comment: one ASCII byte
+    per allele and an index into _CHROMOSOME_SPELLINGS per chromosome
     """
-    if not markers:
-        return 0.0, 0.0, 0.0
+    rsid: List[str] = field(default_factory=list)
+    chromosome: bytearray = field(default_factory=bytearray)
+    position: array = field(default_factory=lambda: array('I'))
+    allele1: bytearray = field(default_factory=bytearray)
+    allele2: bytearray = field(default_factory=bytearray)
+    raw_chromosome: bytearray = field(default_factory=bytearray)
+    raw_allele1: bytearray = field(default_factory=bytearray)
+    raw_allele2: bytearray = field(default_factory=bytearray)
     
-    total_markers = len(markers)
-    missing_calls = 0
-    heterozygous = 0
-    transitions = 0
-    transversions = 0
+    def __len__(self) -> int:
+        return len(self.rsid)
     
-    for marker in markers:
-        allele1 = marker['allele1']  # Now these are encoded numbers
-        allele2 = marker['allele2']
-        
-        # Count missing calls (0 indicates missing data)
-        if allele1 == 0 or allele2 == 0:
-            missing_calls += 1
-        elif allele1 in [1, 2, 3, 4] and allele2 in [1, 2, 3, 4]:
-            # Count heterozygous calls
-            if allele1 != allele2:
-                heterozygous += 1
-                
-                # Count transitions vs transversions
-                # Sort alleles for consistent comparison
-                a1, a2 = sorted([allele1, allele2])
-                
-                # Transitions: A<->G (1<->3), C<->T (2<->4)
-                if (a1 == 1 and a2 == 3) or (a1 == 2 and a2 == 4):
-                    transitions += 1
-                # Transversions: all other combinations
-                elif (a1, a2) in [(1, 2), (1, 4), (2, 3), (3, 4)]:
-                    transversions += 1
+    def extend(self, other: 'MarkerTable'):
+        """
+        Append every marker of another table, column by column
+        """
+        for column in dataclasses.fields(self):
+            getattr(self, column.name).extend(getattr(other, column.name))
+    
+    def truncate(self, count: int):
+        """
+        Keep only the first `count` markers
+        """
+        for column in dataclasses.fields(self):
+            del getattr(self, column.name)[count:]
+
+# Allele pairs are binned by code = allele1 * 5 + allele2 (25 bins). Each
+# quality category is a fixed set of bins, precomputed once:
+# missing if either allele is 0; heterozygous if both are called and
+# differ; transitions are A<->G (1<->3) and C<->T (2<->4), every other
+# heterozygous pair is a transversion
+_MISSING_CODES = tuple(code for code in range(25) if code // 5 == 0 or code % 5 == 0)
+_HETEROZYGOUS_CODES = tuple(code for code in range(25) if code not in _MISSING_CODES and code // 5 != code % 5)
+_TRANSITION_CODES = (1 * 5 + 3, 3 * 5 + 1, 2 * 5 + 4, 4 * 5 + 2)
+_TRANSVERSION_CODES = tuple(code for code in _HETEROZYGOUS_CODES if code not in _TRANSITION_CODES)
+
+# Maps an encoded allele byte to allele * 5 via bytes.translate
+_TIMES_FIVE = bytes((value * 5) & 0xFF for value in range(256))
+
+def _count_pairs(allele1_column: bytearray, allele2_column: bytearray) -> List[int]:
+    """
+    Count encoded (allele1, allele2) pairs over two allele columns
+    Returns: 25 bins indexed by allele1 * 5 + allele2
+    """
+    # Build the pair codes column in C (translate + map/add), then count
+    # each of the 25 codes with bytes.count, like a bincount
+    codes = bytes(map(operator.add, allele1_column.translate(_TIMES_FIVE), allele2_column))
+    return [codes.count(code) for code in range(25)]
+
+def _quality_metrics_from_pairs(pair_counts: List[int], total_markers: int) -> Tuple[float, float, float]:
+    """
+    Derive quality metrics from the 25 allele pair bins
+    Returns: (call_rate, heterozygosity_rate, ti_tv_ratio)
+    """
+    count = pair_counts.__getitem__
+    missing_calls = sum(map(count, _MISSING_CODES))
+    heterozygous = sum(map(count, _HETEROZYGOUS_CODES))
+    transitions = sum(map(count, _TRANSITION_CODES))
+    transversions = sum(map(count, _TRANSVERSION_CODES))
     
     # Calculate rates
     valid_calls = total_markers - missing_calls
@@ -54,47 +96,112 @@ def calculate_quality_metrics(markers: List[Dict]) -> Tuple[float, float, float]
     
     return call_rate, heterozygosity_rate, ti_tv_ratio
 
-def generate_challenge_hash(data: List[Dict]) -> str:
+def calculate_quality_metrics(markers: MarkerTable) -> Tuple[float, float, float]:
+    """
+    Calculate genetic data quality metrics using encoded alleles
+    Returns: (call_rate, heterozygosity_rate, ti_tv_ratio)
+    """
+    if not markers:
+        return 0.0, 0.0, 0.0
+    
+    return _quality_metrics_from_pairs(_count_pairs(markers.allele1, markers.allele2), len(markers))
+
+# Fixed-width record hashed before each rsid's bytes: chromosome (u8),
+# position (u32), allele1 (u8), allele2 (u8), rsid byte length (u32),
+# little-endian. The length keeps marker boundaries unambiguous.
+_PACK_MARKER = struct.Struct('<BIBBI').pack
+
+def _new_challenge_hash():
+    """
+    Create the hash object used for the challenge hash (BLAKE2b-256)
+    """
+    return hashlib.blake2b(digest_size=32)
+
+def generate_challenge_hash(data: MarkerTable) -> str:
     """
     Generate a deterministic challenge hash from the encoded genetic data
+    Uses BLAKE2b with a 32-byte digest
     """
-    # Create a string representation of the encoded data for hashing
-    data_string = ""
-    for marker in data:
-        data_string += f"{marker['rsid']}{marker['chromosome']}{marker['position']}{marker['allele1']}{marker['allele2']}"
+    # Hash input per marker: the _PACK_MARKER record, then the rsid's UTF-8 bytes
+    hash_obj = _new_challenge_hash()
+    for rsid, chromosome, position, allele1, allele2 in zip(data.rsid, data.chromosome, data.position, data.allele1, data.allele2):
+        rsid_bytes = rsid.encode('utf-8')
+        hash_obj.update(_PACK_MARKER(chromosome, position, allele1, allele2, len(rsid_bytes)))
+        hash_obj.update(rsid_bytes)
     
-    # Generate SHA-256 hash
-    hash_obj = hashlib.sha256(data_string.encode('utf-8'))
     return hash_obj.hexdigest()
 
+def _make_allele_lut() -> bytearray:
+    """
+    Build the 256-entry allele lookup table indexed by character code
+    Upper- and lower-case bases share a code, so callers never need
+    .upper(); anything not listed (0, -, D, I, ...) stays 0 for missing
+    """
+    lut = bytearray(256)
+    for code, base in ((1, 'A'), (2, 'T'), (3, 'G'), (4, 'C')):
+        lut[ord(base)] = code
+        lut[ord(base.lower())] = code
+    return lut
+
+_ALLELE_LUT = bytes(_make_allele_lut())
+
 def encode_allele(allele: str) -> int:
     """
     Encode allele character to number for circuit computation
-    A=1, T=2, G=3, C=4, 0/-/D/I=0 (missing)
+    A=1, T=2, G=3, C=4, 0/-/D/I=0 (missing); anything else is 0 (missing)
     """
-    allele_encoding = {
-        'A': 1, 'T': 2, 'G': 3, 'C': 4,
-        '0': 0, '-': 0, 'D': 0, 'I': 0
-    }
-    return allele_encoding.get(allele.upper(), 0)
+    if len(allele) != 1 or ord(allele) > 255:
+        return 0
+    return _ALLELE_LUT[ord(allele)]
+
+# Chromosome lookup: 1-22 (ASCII digits, no zero padding), X, Y and MT/M in
+# either case -- the same spellings _ROW_RE accepts
+_CHROMOSOME_CODES = {str(i): i for i in range(1, 23)}
+_CHROMOSOME_CODES.update({
+    'X': 23, 'x': 23,
+    'Y': 24, 'y': 24,
+    'MT': 25, 'Mt': 25, 'mT': 25, 'mt': 25, 'M': 25, 'm': 25
+})
+
+# Every accepted chromosome spelling, so the raw spelling of a marker can be
+# kept as a one-byte index instead of a string
+_CHROMOSOME_SPELLINGS = tuple(_CHROMOSOME_CODES)
+_CHROMOSOME_SPELLING_INDEX = {spelling: index for index, spelling in enumerate(_CHROMOSOME_SPELLINGS)}
 
 def encode_chromosome(chromosome: str) -> int:
     """
     Encode chromosome to number
     1-22=1-22, X=23, Y=24, MT/M=25
     """
-    if chromosome.isdigit():
-        chr_num = int(chromosome)
-        if 1 <= chr_num <= 22:
-            return chr_num
-    elif chromosome.upper() == 'X':
-        return 23
-    elif chromosome.upper() == 'Y':
-        return 24
-    elif chromosome.upper() in ['MT', 'M']:
-        return 25
-    
-    return 0  # Invalid chromosome
+    return _CHROMOSOME_CODES.get(chromosome, 0)  # 0 = invalid chromosome
+
+# Largest position the circuit's u32 position field can hold
+_MAX_POSITION = 0xFFFFFFFF
+
+# One tab-separated data row: rsid ('rs' or 'i' prefix, then word characters),
+# chromosome (1-22, X, Y, MT/M), position (> 0) and two alleles (A, T, G, C,
+# 0, -, D, I). re.ASCII keeps \w and \d to ASCII, so rsids can't carry quotes,
+# backslashes or control bytes into the TOML output or the challenge hash.
+_ROW_RE = re.compile(
+    r'((?:rs|i)\w+)\t'
+    r'([1-9]|1\d|2[0-2]|[XYxy]|[Mm][Tt]?)\t'
+    r'(0*[1-9]\d*)\t'
+    r'([ATGC0\-DI])\t'
+    r'([ATGC0\-DI])',
+    re.ASCII
+)
+
+# Same row with whitespace (other than tabs) padding any field; padding is
+# left out of the groups, like stripping each field.
+# Only tried when _ROW_RE fails, so unpadded rows keep the cheaper match.
+_PADDED_ROW_RE = re.compile(
+    r'((?:rs|i)\w+)[^\S\t]*\t[^\S\t]*'
+    r'([1-9]|1\d|2[0-2]|[XYxy]|[Mm][Tt]?)[^\S\t]*\t[^\S\t]*'
+    r'(0*[1-9]\d*)[^\S\t]*\t[^\S\t]*'
+    r'([ATGC0\-DI])[^\S\t]*\t[^\S\t]*'
+    r'([ATGC0\-DI])',
+    re.ASCII
+)
 
 def validate_genetic_marker(fields: List[str]) -> bool:
     """
@@ -103,129 +210,321 @@ def validate_genetic_marker(fields: List[str]) -> bool:
     if len(fields) != 5:
         return False
     
-    rsid, chromosome, position, allele1, allele2 = fields
-    
-    # Validate rsid format (should start with 'rs' or 'i')
-    if not (rsid.startswith('rs') or rsid.startswith('i')):
-        return False
-    
-    # Validate chromosome (1-22, X, Y, MT)
-    if encode_chromosome(chromosome) == 0:
-        return False
-    
-    # Validate position (should be numeric)
-    try:
-        pos = int(position)
-        if pos <= 0:
-            return False
-    except ValueError:
-        return False
-    
-    # Validate alleles (should be A, T, G, C, 0, -, D, or I)
-    valid_alleles = {'A', 'T', 'G', 'C', '0', '-', 'D', 'I'}
-    if allele1 not in valid_alleles or allele2 not in valid_alleles:
-        return False
-    
-    return True
+    line = '\t'.join(fields)
+    match = _ROW_RE.fullmatch(line) or _PADDED_ROW_RE.fullmatch(line)
+    return match is not None and int(match[3]) <= _MAX_POSITION
+
+# Parsing is only spread over worker processes when both the marker cap
+# and the data section are large enough to pay for process start-up
+_PARALLEL_MIN_MARKERS = 100_000
+_PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+_PARALLEL_RANGES_PER_WORKER = 4
 
-def parse_23andme_file(filename: str, max_markers: int = 1000) -> List[Dict]:
+def _parse_marker_lines(lines: Iterable[str], max_markers: int, verbose: bool = True,
+                        hash_obj=None, pair_counts: Optional[List[int]] = None,
+                        skipped_before: Optional[array] = None) -> Tuple[MarkerTable, int, List[Tuple[int, List[str]]]]:
     """
-    Parse 23andMe TSV file and extract genetic markers
+    Parse stripped data lines into a MarkerTable, stopping at max_markers
+    When given, hash_obj and the 25 pair_counts bins are updated inline for
+    every accepted marker, so hashing and quality counting share the parse
+    pass instead of walking the columns again afterwards
+    When given, skipped_before receives the running skipped count before
+    each accepted marker, so a caller can cut the count at any marker
+    Returns: (markers, skipped_count, first 10 skipped rows as (line number, fields))
     """
-    markers = []
+    markers = MarkerTable()
+    processed_count = 0
+    skipped_count = 0
+    skipped_rows = []
+    hash_update = hash_obj.update if hash_obj is not None else None
+    if pair_counts is None:
+        pair_counts = [0] * 25
     
-    try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-        
-        if not lines:
-            raise ValueError("File is empty")
+    # The cap is checked after each append so reading stops early; a cap
+    # of zero or less must not let the first row through
+    if max_markers <= 0:
+        if verbose:
+            print(f"✅ Reached maximum limit of {max_markers} markers")
+        return markers, skipped_count, skipped_rows
+    
+    # Bind everything the per-row path touches to locals so each row costs
+    # a regex match plus a handful of C-level appends and lookups
+    match_row = _ROW_RE.fullmatch
+    match_padded_row = _PADDED_ROW_RE.fullmatch
+    pack_marker = _PACK_MARKER
+    allele_lut = _ALLELE_LUT
+    lookup_chromosome = _CHROMOSOME_CODES.get
+    lookup_spelling = _CHROMOSOME_SPELLING_INDEX.__getitem__
+    append_rsid = markers.rsid.append
+    append_chromosome = markers.chromosome.append
+    append_position = markers.position.append
+    append_allele1 = markers.allele1.append
+    append_allele2 = markers.allele2.append
+    append_raw_chromosome = markers.raw_chromosome.append
+    append_raw_allele1 = markers.raw_allele1.append
+    append_raw_allele2 = markers.raw_allele2.append
+    
+    for i, line in enumerate(lines, 1):
+        if not line:  # Skip empty lines
+            continue
         
-        # Skip header comments (lines starting with #)
-        data_start = 0
-        for i, line in enumerate(lines):
-            if not line.strip().startswith('#'):
-                data_start = i
-                break
+        # Validate marker format
+        match = match_row(line) or match_padded_row(line)
+        if match is not None:
+            rsid, chromosome, position, allele1, allele2 = match.groups()
+            position = int(position)
+            chromosome_code = lookup_chromosome(chromosome, 0)
+        # A chromosome the table can't encode is an invalid row, never an error
+        if match is None or position > _MAX_POSITION or chromosome_code == 0:
+            skipped_count += 1
+            if skipped_count <= 10:  # Only show first 10 warnings
+                fields = line.split('\t')
+                skipped_rows.append((i, fields))
+                if verbose:
+                    print(f"⚠️  Skipping invalid marker on line {i}: {fields}")
+            continue
         
-        if data_start >= len(lines):
-            raise ValueError("No data found in file")
+        # Same encodings as encode_allele, without the function calls; the
+        # regex guarantees single-character ASCII alleles
+        allele1_byte = ord(allele1)
+        allele2_byte = ord(allele2)
+        allele1_code = allele_lut[allele1_byte]
+        allele2_code = allele_lut[allele2_byte]
         
-        # Parse header line
-        header_line = lines[data_start].strip()
-        headers = [h.strip() for h in header_line.split('\t')]
+        append_rsid(rsid)
+        append_chromosome(chromosome_code)
+        append_position(position)
+        append_allele1(allele1_code)
+        append_allele2(allele2_code)
+        append_raw_chromosome(lookup_spelling(chromosome))
+        append_raw_allele1(allele1_byte)
+        append_raw_allele2(allele2_byte)
+        if skipped_before is not None:
+            skipped_before.append(skipped_count)
         
-        # Validate expected headers
-        expected_headers = ['rsid', 'chromosome', 'position', 'allele1', 'allele2']
-        if not all(h in headers for h in expected_headers):
-            raise ValueError(f"Invalid headers. Expected: {expected_headers}, Found: {headers}")
+        # Quality counting and challenge hashing, fused into the same pass
+        pair_counts[allele1_code * 5 + allele2_code] += 1
+        if hash_update is not None:
+            rsid_bytes = rsid.encode('utf-8')
+            hash_update(pack_marker(chromosome_code, position, allele1_code, allele2_code, len(rsid_bytes)))
+            hash_update(rsid_bytes)
         
-        print(f"✅ Valid headers found: {headers}")
+        processed_count += 1
         
-        # Parse data lines
-        processed_count = 0
-        skipped_count = 0
+        # Progress indicator
+        if verbose and processed_count % 100 == 0:
+            print(f"📊 Processed {processed_count} markers...")
         
-        for i, line in enumerate(lines[data_start + 1:], 1):
-            if processed_count >= max_markers:
+        # Stop reading as soon as the cap is hit
+        if processed_count >= max_markers:
+            if verbose:
                 print(f"✅ Reached maximum limit of {max_markers} markers")
-                break
-                
-            line = line.strip()
-            if not line:  # Skip empty lines
-                continue
+            break
+    
+    return markers, skipped_count, skipped_rows
+
+def _parse_chunk(filename: str, start: int, end: int) -> Tuple[MarkerTable, array, List[Tuple[int, List[str]]], int, int]:
+    """
+    Parse the data lines in byte range [start, end) of a file (worker process)
+    Returns: (markers, skipped count before each marker, first 10 skipped
+    rows, total skipped count, line count)
+    """
+    with open(filename, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            chunk = mapped[start:end]
+    
+    lines = map(str.strip, map(bytes.decode, chunk.split(b'\n')))
+    skipped_before = array('I')
+    markers, skipped_count, skipped_rows = _parse_marker_lines(lines, end - start, verbose=False, skipped_before=skipped_before)
+    return markers, skipped_before, skipped_rows, skipped_count, chunk.count(b'\n')
+
+def _default_workers() -> int:
+    """
+    Number of CPUs this process may run on (respects CPU affinity)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _parse_parallel(filename: str, mapped: mmap.mmap, data_start: int, max_markers: int, workers: int) -> Tuple[MarkerTable, int]:
+    """
+    Parse the data section in line-aligned byte ranges on a process pool,
+    merging the per-range results back in file order
+    At most `workers` ranges are in flight; no new range is started once the
+    cap is hit, though ranges already running still finish
+    Returns: (markers, skipped_count) with skipped rows counted up to the cap,
+    matching the sequential path
+    """
+    size = len(mapped)
+    
+    # Cut the data section into several ranges per worker, moving each cut
+    # forward to the start of the next line. Smaller ranges bound the work
+    # wasted past the cap.
+    range_count = workers * _PARALLEL_RANGES_PER_WORKER
+    bounds = [data_start]
+    for k in range(1, range_count):
+        cut = mapped.find(b'\n', max(bounds[-1], data_start + (size - data_start) * k // range_count))
+        bounds.append(size if cut == -1 else cut + 1)
+    bounds.append(size)
+    ranges = iter(zip(bounds[:-1], bounds[1:]))
+    
+    markers = MarkerTable()
+    skipped_count = 0
+    warnings_shown = 0
+    line_offset = 0
+    
+    print(f"⚙️  Parsing with {workers} worker processes")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        
+        def submit_next():
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(pool.submit(_parse_chunk, filename, *next_range))
+        
+        for _ in range(workers):
+            submit_next()
+        
+        while pending:
+            chunk_markers, skipped_before, skipped_rows, chunk_skipped, line_count = pending.popleft().result()
             
-            fields = [f.strip() for f in line.split('\t')]
+            # If the cap falls inside this range, only count the rows
+            # skipped before the marker that reached it
+            needed = max_markers - len(markers)
+            if len(chunk_markers) >= needed:
+                chunk_markers.truncate(needed)
+                chunk_skipped = skipped_before[needed - 1]
+                skipped_rows = skipped_rows[:chunk_skipped]
             
-            # Validate marker format
-            if not validate_genetic_marker(fields):
-                skipped_count += 1
-                if skipped_count <= 10:  # Only show first 10 warnings
-                    print(f"⚠️  Skipping invalid marker on line {i}: {fields}")
-                continue
+            for line_num, row_fields in skipped_rows:
+                if warnings_shown < 10:  # Only show first 10 warnings
+                    print(f"⚠️  Skipping invalid marker on line {line_offset + line_num}: {row_fields}")
+                    warnings_shown += 1
+            skipped_count += chunk_skipped
+            line_offset += line_count
             
-            rsid, chromosome, position, allele1, allele2 = fields
+            markers.extend(chunk_markers)
+            print(f"📊 Processed {len(markers)} markers...")
             
-            markers.append({
-                'rsid': rsid,
-                'chromosome': encode_chromosome(chromosome),
-                'position': int(position),
-                'allele1': encode_allele(allele1),
-                'allele2': encode_allele(allele2),
-                'raw_chromosome': chromosome,  # Keep original for reference
-                'raw_allele1': allele1,        # Keep original for reference
-                'raw_allele2': allele2         # Keep original for reference
-            })
+            if len(markers) >= max_markers:
+                print(f"✅ Reached maximum limit of {max_markers} markers")
+                for future in pending:
+                    future.cancel()
+                break
             
-            processed_count += 1
+            submit_next()
+    
+    return markers, skipped_count
+
+def parse_23andme_file(filename: str, max_markers: int = 1000, workers: Optional[int] = None) -> Tuple[MarkerTable, Tuple[float, float, float], str]:
+    """
+    Parse 23andMe TSV file and extract genetic markers
+    Quality metrics and the challenge hash are computed in the same pass
+    Large inputs are parsed on up to `workers` processes (default: usable CPUs)
+    Returns: (markers, (call_rate, heterozygosity_rate, ti_tv_ratio), challenge_hash)
+    """
+    try:
+        with open(filename, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError("File is empty")
             
-            # Progress indicator
-            if processed_count % 100 == 0:
-                print(f"📊 Processed {processed_count} markers...")
+            # Map the file read-only so lines are sliced straight out of the
+            # page cache instead of being copied through a read buffer
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                size = len(mapped)
+                
+                # Skip header comments (lines starting with #)
+                data_start = 0
+                line_end = 0
+                while data_start < size:
+                    line_end = mapped.find(b'\n', data_start)
+                    if line_end == -1:
+                        line_end = size
+                    if not mapped[data_start:line_end].strip().startswith(b'#'):
+                        break
+                    data_start = line_end + 1
+                
+                if data_start >= size:
+                    raise ValueError("No data found in file")
+                
+                # Parse header line
+                header_line = mapped[data_start:line_end].decode('utf-8').strip()
+                headers = [h.strip() for h in header_line.split('\t')]
+                
+                # Validate expected headers
+                expected_headers = ['rsid', 'chromosome', 'position', 'allele1', 'allele2']
+                if not all(h in headers for h in expected_headers):
+                    raise ValueError(f"Invalid headers. Expected: {expected_headers}, Found: {headers}")
+                
+                print(f"✅ Valid headers found: {headers}")
+                
+                data_start = min(line_end + 1, size)
+                if workers is None:
+                    workers = _default_workers()
+                
+                if workers > 1 and max_markers >= _PARALLEL_MIN_MARKERS and size - data_start >= _PARALLEL_MIN_BYTES:
+                    # Ranges finish out of order, so metrics and hash run
+                    # over the merged columns once they are back in order
+                    markers, skipped_count = _parse_parallel(filename, mapped, data_start, max_markers, workers)
+                    metrics = calculate_quality_metrics(markers)
+                    challenge_hash = generate_challenge_hash(markers)
+                else:
+                    # Parse data lines, streaming them off the mapping so
+                    # reading stops as soon as the cap is hit
+                    mapped.seek(data_start)
+                    lines = map(str.strip, map(bytes.decode, iter(mapped.readline, b'')))
+                    hash_obj = _new_challenge_hash()
+                    pair_counts = [0] * 25
+                    markers, skipped_count, _ = _parse_marker_lines(lines, max_markers, hash_obj=hash_obj, pair_counts=pair_counts)
+                    metrics = _quality_metrics_from_pairs(pair_counts, len(markers))
+                    challenge_hash = hash_obj.hexdigest()
         
-        print(f"✅ Successfully processed {processed_count} markers")
+        print(f"✅ Successfully processed {len(markers)} markers")
         if skipped_count > 0:
             print(f"⚠️  Skipped {skipped_count} invalid markers")
         
-        return markers
+        return markers, metrics, challenge_hash
         
     except FileNotFoundError:
         raise FileNotFoundError(f"❌ File not found: {filename}")
     except Exception as e:
         raise Exception(f"❌ Error reading file: {str(e)}")
 
-def write_toml_file(markers: List[Dict], output_filename: str):
+# TOML entry for one marker, formatted in order from: rsid, chromosome,
+# position, allele1, allele2, and the raw chromosome, allele1 and allele2
+# spellings. Original values are kept as a comment.
+_DNA_ENTRY = (
+    '[[dna]]\n'
+    'allele1 = {3}\n'
+    'allele2 = {4}\n'
+    'chromosome = {1}\n'
+    'position = {2}\n'
+    'rsid = "{0}"\n'
+    '# Original: {6}/{7} on chr{5} at {2}\n'
+    '\n'
+)
+
+def write_toml_file(markers: MarkerTable, output_filename: str,
+                    metrics: Optional[Tuple[float, float, float]] = None, challenge_hash: Optional[str] = None) -> Dict:
     """
     Write genetic markers to TOML file with encoded alleles and chromosomes
+    Metrics and challenge hash already computed by parse_23andme_file can be
+    passed in; anything missing is computed from the markers
+    Returns counters describing what was written, for validate_toml_output
     """
     if not markers:
         raise ValueError("No markers to write")
+    if not len(markers.raw_chromosome) == len(markers.raw_allele1) == len(markers.raw_allele2) == len(markers):
+        raise ValueError("Markers are missing their original values")
     
     # Calculate quality metrics
-    call_rate, het_rate, ti_tv = calculate_quality_metrics(markers)
+    if metrics is None:
+        metrics = calculate_quality_metrics(markers)
+    call_rate, het_rate, ti_tv = metrics
     
     # Generate challenge hash
-    challenge_hash = generate_challenge_hash(markers)
+    if challenge_hash is None:
+        challenge_hash = generate_challenge_hash(markers)
     
     print(f"📊 Quality Metrics:")
     print(f"   Call Rate: {call_rate:.4f} ({call_rate*100:.2f}%)")
@@ -234,37 +533,47 @@ def write_toml_file(markers: List[Dict], output_filename: str):
     print(f"   Challenge Hash: {challenge_hash[:16]}...")
     
     try:
+        # Build the document up front and write it in one go instead of
+        # issuing several small writes per marker
+        header = (
+            # Header comment explaining encoding
+            '# Genetic Data Encoding:\n'
+            '# Alleles: A=1, T=2, G=3, C=4, Missing=0\n'
+            '# Chromosomes: 1-22=1-22, X=23, Y=24, MT=25\n'
+            '# Challenge hash: BLAKE2b-256 of the encoded markers\n'
+            '\n'
+            # Header with quality metrics
+            f'challenge_hash = "{challenge_hash}"\n'
+            f'min_call_rate = "{call_rate:.6f}"\n'
+            f'min_heterozygosity_rate = "{het_rate:.6f}"\n'
+            f'ti_tv_ratio = "{ti_tv:.6f}"\n'
+            '\n'
+        )
+        
+        # One entry per DNA marker with encoded values
+        columns = zip(markers.rsid, markers.chromosome, markers.position, markers.allele1, markers.allele2,
+                      map(_CHROMOSOME_SPELLINGS.__getitem__, markers.raw_chromosome),
+                      markers.raw_allele1.decode('ascii'),
+                      markers.raw_allele2.decode('ascii'))
+        entries = ''.join(starmap(_DNA_ENTRY.format, columns))
+        
         with open(output_filename, 'w', encoding='utf-8') as file:
-            # Write header comment explaining encoding
-            file.write('# Genetic Data Encoding:\n')
-            file.write('# Alleles: A=1, T=2, G=3, C=4, Missing=0\n')
-            file.write('# Chromosomes: 1-22=1-22, X=23, Y=24, MT=25\n')
-            file.write('\n')
-            
-            # Write header with quality metrics
-            file.write(f'challenge_hash = "{challenge_hash}"\n')
-            file.write(f'min_call_rate = "{call_rate:.6f}"\n')
-            file.write(f'min_heterozygosity_rate = "{het_rate:.6f}"\n')
-            file.write(f'ti_tv_ratio = "{ti_tv:.6f}"\n')
-            file.write('\n')
-            
-            # Write each DNA marker with encoded values
-            for i, marker in enumerate(markers):
-                file.write('[[dna]]\n')
-                file.write(f'allele1 = {marker["allele1"]}\n')  # Now numbers
-                file.write(f'allele2 = {marker["allele2"]}\n')  # Now numbers
-                file.write(f'chromosome = {marker["chromosome"]}\n')  # Now numbers
-                file.write(f'position = {marker["position"]}\n')
-                file.write(f'rsid = "{marker["rsid"]}"\n')
-                
-                # Add original values as comments for reference
-                file.write(f'# Original: {marker["raw_allele1"]}/{marker["raw_allele2"]} on chr{marker["raw_chromosome"]} at {marker["position"]}\n')
-                file.write('\n')
+            file.write(header)
+            file.write(entries)
         
         print(f"✅ Successfully wrote {len(markers)} encoded markers to {output_filename}")
         print(f"🔢 Allele encoding: A=1, T=2, G=3, C=4, Missing=0")
         print(f"🧬 Chromosome encoding: 1-22=1-22, X=23, Y=24, MT=25")
         
+        # The header always carries every required field, so only the
+        # encoded columns need checking
+        return {
+            'dna_sections': len(markers),
+            'missing_fields': [],
+            'has_encoded_alleles': any(markers.allele1.count(code) for code in (1, 2, 3, 4)),
+            'has_encoded_chromosomes': any(markers.chromosome.count(code) for code in range(1, 26))
+        }
+        
     except Exception as e:
         raise Exception(f"❌ Error writing TOML file: {str(e)}")
 
@@ -278,24 +587,32 @@ def display_encoding_info():
     print("   This encoding optimizes genetic data for ZK circuit computation")
     print()
 
-def validate_toml_output(filename: str):
+def validate_toml_output(filename: str, write_stats: Optional[Dict] = None):
     """
     Basic validation of the generated TOML file with encoded values
+    Uses the counters returned by write_toml_file when given; otherwise
+    reads the file back and scans it (thorough check, enabled by --debug)
     """
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        # Count [[dna]] sections
-        dna_sections = content.count('[[dna]]')
-        
-        # Check for required fields
-        required_fields = ['challenge_hash', 'min_call_rate', 'min_heterozygosity_rate', 'ti_tv_ratio']
-        missing_fields = [field for field in required_fields if field not in content]
-        
-        # Check for encoded values (should contain numbers without quotes for alleles/chromosomes)
-        has_encoded_alleles = 'allele1 = 1' in content or 'allele1 = 2' in content or 'allele1 = 3' in content or 'allele1 = 4' in content
-        has_encoded_chromosomes = any(f'chromosome = {i}' in content for i in range(1, 26))
+        if write_stats is not None:
+            dna_sections = write_stats['dna_sections']
+            missing_fields = write_stats['missing_fields']
+            has_encoded_alleles = write_stats['has_encoded_alleles']
+            has_encoded_chromosomes = write_stats['has_encoded_chromosomes']
+        else:
+            with open(filename, 'r', encoding='utf-8') as file:
+                content = file.read()
+            
+            # Count [[dna]] sections
+            dna_sections = content.count('[[dna]]')
+            
+            # Check for required fields
+            required_fields = ['challenge_hash', 'min_call_rate', 'min_heterozygosity_rate', 'ti_tv_ratio']
+            missing_fields = [field for field in required_fields if field not in content]
+            
+            # Check for encoded values (should contain numbers without quotes for alleles/chromosomes)
+            has_encoded_alleles = 'allele1 = 1' in content or 'allele1 = 2' in content or 'allele1 = 3' in content or 'allele1 = 4' in content
+            has_encoded_chromosomes = any(f'chromosome = {i}' in content for i in range(1, 26))
         
         if missing_fields:
             print(f"⚠️  Warning: Missing fields in TOML: {missing_fields}")
@@ -323,14 +640,18 @@ def main():
     display_encoding_info()
     
     # Handle command line arguments
-    if len(sys.argv) < 2:
-        print("Usage: python genetic_to_toml.py <input_file.txt> [output_file.toml] [max_markers]")
+    debug = '--debug' in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--debug']
+    
+    if len(args) < 1:
+        print("Usage: python genetic_to_toml.py <input_file.txt> [output_file.toml] [max_markers] [--debug]")
         print("Example: python genetic_to_toml.py genome_data.txt output.toml 1000")
+        print("  --debug  re-read the written TOML file to validate it")
         sys.exit(1)
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else 'genetic_data.toml'
-    max_markers = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+    input_file = args[0]
+    output_file = args[1] if len(args) > 1 else 'genetic_data.toml'
+    max_markers = int(args[2]) if len(args) > 2 else 1000
     
     # Validate input file exists
     if not os.path.exists(input_file):
@@ -341,7 +662,7 @@ def main():
         # Parse the genetic data file
         print(f"📖 Reading genetic data from: {input_file}")
         print(f"🎯 Processing maximum {max_markers} markers")
-        markers = parse_23andme_file(input_file, max_markers)
+        markers, metrics, challenge_hash = parse_23andme_file(input_file, max_markers)
         
         if not markers:
             print("❌ No valid genetic markers found in file")
@@ -349,11 +670,11 @@ def main():
         
         # Write TOML output
         print(f"💾 Writing TOML output to: {output_file}")
-        write_toml_file(markers, output_file)
+        write_stats = write_toml_file(markers, output_file, metrics, challenge_hash)
         
-        # Validate output
+        # Validate output (from the writer's counters unless debugging)
         print("🔍 Validating output file...")
-        if validate_toml_output(output_file):
+        if validate_toml_output(output_file, None if debug else write_stats):
             print("🎉 Conversion completed successfully!")
             
             # Show file sizes
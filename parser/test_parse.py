@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the 23andMe to TOML converter
+Run with: python -m unittest discover -s parser
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import parse
+
+HEADER = "# raw data\nrsid\tchromosome\tposition\tallele1\tallele2\n"
+
+def parse_text(text: str, max_markers: int = 1000, workers: int = 1):
+    """
+    Write text to a temporary file and parse it, discarding progress output
+    Returns: (markers, metrics, challenge_hash, captured output)
+    """
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as file:
+        file.write(text)
+    try:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            markers, metrics, challenge_hash = parse.parse_23andme_file(file.name, max_markers, workers=workers)
+        return markers, metrics, challenge_hash, output.getvalue()
+    finally:
+        os.unlink(file.name)
+
+class TestAlleleEncoding(unittest.TestCase):
+    def test_bases_in_either_case(self):
+        self.assertEqual([parse.encode_allele(base) for base in 'ATGCatgc'], [1, 2, 3, 4, 1, 2, 3, 4])
+
+    def test_anything_else_is_missing(self):
+        for allele in ['0', '-', 'D', 'I', '', 'Δ', 'AT']:
+            self.assertEqual(parse.encode_allele(allele), 0, allele)
+
+class TestChromosomeEncoding(unittest.TestCase):
+    def test_non_ascii_digit_chromosome_is_rejected(self):
+        self.assertEqual(parse.encode_chromosome('1٣'), 0)
+        self.assertFalse(parse.validate_genetic_marker(['rs1', '1٣', '5', 'A', 'G']))
+
+    def test_non_ascii_digit_row_is_skipped(self):
+        markers, _, _, output = parse_text(
+            HEADER +
+            "rs1\t1٣\t5\tA\tG\n"
+            "rs2\t13\t6\tA\tG\n"
+        )
+        self.assertEqual(markers.rsid, ['rs2'])
+        self.assertEqual(list(markers.chromosome), [13])
+        self.assertIn("Skipped 1 invalid markers", output)
+
+    def test_zero_padded_chromosome_is_rejected(self):
+        for chromosome in ('01', '001', '010', '0X'):
+            self.assertEqual(parse.encode_chromosome(chromosome), 0)
+            self.assertFalse(parse.validate_genetic_marker(['rs1', chromosome, '5', 'A', 'G']))
+
+class TestFieldWhitespace(unittest.TestCase):
+    def test_padded_fields_are_stripped(self):
+        markers, _, _, output = parse_text(
+            HEADER +
+            "rs1\t1\t5\tA \tG\n"
+            "rs2 \t2\t6\tA\tG\n"
+            "i3\t X \t 7 \t C\tT\n"
+        )
+        self.assertEqual(markers.rsid, ['rs1', 'rs2', 'i3'])
+        self.assertEqual(list(markers.chromosome), [1, 2, 23])
+        self.assertEqual(list(markers.position), [5, 6, 7])
+        self.assertEqual(list(markers.allele1), [1, 1, 4])
+        self.assertNotIn("Skipped", output)
+
+    def test_padding_does_not_change_challenge_hash(self):
+        _, _, padded_hash, _ = parse_text(HEADER + "rs1 \t1\t5\tA \tG\n")
+        _, _, plain_hash, _ = parse_text(HEADER + "rs1\t1\t5\tA\tG\n")
+        self.assertEqual(padded_hash, plain_hash)
+
+class TestRsidValidation(unittest.TestCase):
+    def test_rsid_must_be_word_characters(self):
+        markers, _, _, output = parse_text(
+            HEADER +
+            "rs1\t1\t5\tA\tG\n"
+            "rs2\"\t1\t6\tA\tG\n"
+            "rs3\\\t1\t7\tA\tG\n"
+            "rs4\x01x\t1\t8\tA\tG\n"
+            "rs\t1\t9\tA\tG\n"
+            "i_10\t1\t10\tA\tG\n"
+        )
+        self.assertEqual(markers.rsid, ['rs1', 'i_10'])
+        self.assertIn("Skipped 4 invalid markers", output)
+        self.assertFalse(parse.validate_genetic_marker(['rs2"', '1', '6', 'A', 'G']))
+
+class TestTomlOutput(unittest.TestCase):
+    def test_original_comment_keeps_input_spelling(self):
+        markers, metrics, challenge_hash, _ = parse_text(
+            HEADER +
+            "rs1\tM\t5\t-\tD\n"
+            "rs2\tx\t6\tI\tA\n"
+            "rs3\tmt\t7\tG\t0\n"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            output_filename = os.path.join(directory, 'out.toml')
+            with contextlib.redirect_stdout(io.StringIO()):
+                parse.write_toml_file(markers, output_filename, metrics, challenge_hash)
+            with open(output_filename, encoding='utf-8') as file:
+                comments = [line for line in file if line.startswith('# Original:')]
+        self.assertEqual(comments, [
+            '# Original: -/D on chrM at 5\n',
+            '# Original: I/A on chrx at 6\n',
+            '# Original: G/0 on chrmt at 7\n',
+        ])
+
+class TestParallelParse(unittest.TestCase):
+    # Every 7th row is invalid, so most ranges start or end near a skipped row
+    TEXT = HEADER + ''.join(
+        f"rs{i}\t{i % 22 + 1}\t{i + 1}\t{'ATGC-'[i % 5]}\t{'GCAT0'[i % 5]}\n" if i % 7
+        else f"rs{i}\t99\t{i + 1}\tA\tG\n"
+        for i in range(400)
+    )
+
+    def assert_same_as_sequential(self, max_markers: int):
+        with mock.patch.object(parse, '_PARALLEL_MIN_MARKERS', 1), mock.patch.object(parse, '_PARALLEL_MIN_BYTES', 1):
+            sequential = parse_text(self.TEXT, max_markers, workers=1)
+            parallel = parse_text(self.TEXT, max_markers, workers=2)
+        self.assertNotIn("worker processes", sequential[3])
+        self.assertIn("Parsing with 2 worker processes", parallel[3])
+        self.assertEqual(parallel[:3], sequential[:3])
+        for prefix in ("⚠️  Skipping", "⚠️  Skipped"):
+            self.assertEqual([line for line in parallel[3].splitlines() if line.startswith(prefix)],
+                             [line for line in sequential[3].splitlines() if line.startswith(prefix)])
+
+    def test_cap_inside_a_range(self):
+        self.assert_same_as_sequential(150)
+
+    def test_unlimited(self):
+        self.assert_same_as_sequential(10**6)
+
+def make_table(rows) -> parse.MarkerTable:
+    """
+    Build a MarkerTable from (rsid, chromosome, position, allele1, allele2) rows
+    """
+    markers = parse.MarkerTable()
+    for rsid, chromosome, position, allele1, allele2 in rows:
+        markers.rsid.append(rsid)
+        markers.chromosome.append(chromosome)
+        markers.position.append(position)
+        markers.allele1.append(allele1)
+        markers.allele2.append(allele2)
+    return markers
+
+class TestChallengeHash(unittest.TestCase):
+    def test_marker_boundaries_are_unambiguous(self):
+        # Without a length prefix, the first table's rsid spells out the
+        # second table's two markers byte for byte
+        one_marker = make_table([('rs1\x01AAAA\x01\x01rs2', 1, 0x41414141, 1, 1)])
+        two_markers = make_table([('rs1', 1, 0x41414141, 1, 1), ('rs2', 1, 0x41414141, 1, 1)])
+        self.assertNotEqual(parse.generate_challenge_hash(one_marker), parse.generate_challenge_hash(two_markers))
+
+    def test_fused_hash_matches_generate_challenge_hash(self):
+        markers, _, challenge_hash, _ = parse_text(HEADER + "rs1\t1\t5\tA\tG\ni2\tMT\t6\t0\t0\n")
+        self.assertEqual(challenge_hash, parse.generate_challenge_hash(markers))
+
+if __name__ == '__main__':
+    unittest.main()